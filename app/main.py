@@ -1,11 +1,21 @@
 from flask import Flask
 from flask_cors import CORS
+from config import Config
 
 def create_app():
     """Initialize and configure the Flask application"""
     app = Flask(__name__)
     CORS(app)  # Enable CORS for all endpoints
     
+    # Serve repeated host lookups from the in-process DNS cache
+    if Config.DNS_CACHE_ENABLED:
+        from app.services.dns_service import dns_cache
+        dns_cache.install()
+    
+    # Expire spooled ZIP archives even when no requests come in
+    from app.services.download_service import start_spool_janitor
+    start_spool_janitor(Config.ZIP_SPOOL_TTL_HOURS, Config.ZIP_SPOOL_CLEANUP_INTERVAL_SECONDS)
+    
     # Import blueprints - ensure these match your actual file names
     from app.routes.url_route import url_bp  # Change from url_routes to url_route if that's your file name
     from app.routes.xml_route import xml_bp  # Change from xml_routes to xml_route if that's your file name
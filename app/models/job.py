@@ -1,14 +1,42 @@
 import time
+import json
+import hashlib
+import threading
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+def compute_job_fingerprint(kind, urls, options=None, idempotency_key=None, ordered=False):
+    """Compute the key used to detect duplicate submissions of the same job"""
+    if idempotency_key:
+        return f"{kind}:key:{idempotency_key}"
+    
+    normalized = []
+    for url in urls:
+        url = str(url).strip()
+        try:
+            parts = urlsplit(url)
+            url = urlunsplit(parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower()))
+        except ValueError:
+            pass
+        normalized.append(url)
+    
+    # Order-insensitive, but duplicates still change totals and counts
+    if not ordered:
+        normalized = sorted(normalized)
+    
+    payload = json.dumps({'urls': normalized, 'options': options or {}}, sort_keys=True, ensure_ascii=False)
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
 
 class JobManager:
     """Manages job tracking for asynchronous URL validation and analysis tasks"""
     
     def __init__(self):
         self.jobs = {}
+        self.fingerprints = {}
+        self.lock = threading.Lock()
     
-    def create_job(self, job_id, urls, job_type="standard"):
+    def create_job(self, job_id, urls, job_type="standard", base_job_id=None, sampling=False, fingerprint=None):
         """Initialize a new job with the given parameters"""
         job_data = {
             'status': 'in_progress',
@@ -17,7 +45,8 @@ class JobManager:
             'results': [],
             'urls': urls,
             'created_at': time.time(),
-            'job_type': job_type
+            'job_type': job_type,
+            'fingerprint': fingerprint
         }
         
         # Add specific counters for XML analysis jobs
@@ -34,9 +63,44 @@ class JobManager:
                 'study': Counter()
             }
             
+            # Rows resolved outside the random sample order (excluded from estimates)
+            if sampling:
+                job_data['sampling'] = {'excluded': 0}
+        
+        # Add delta tracking for jobs re-validated against an earlier job
+        if base_job_id:
+            job_data['delta'] = {
+                'base_job_id': base_job_id,
+                'rechecked': 0,
+                'carried_forward': 0
+            }
+            job_data['changes'] = []
+        
+        # Add spool file tracking for archive jobs
+        if job_type == "archive":
+            job_data['archive_path'] = None
+            job_data['message'] = ""
+            
         self.jobs[job_id] = job_data
         return job_data
     
+    def find_or_create_job(self, job_id, urls, fingerprint, window, **kwargs):
+        """Return (job_id, created): reuse a running or recently finished job with the same fingerprint"""
+        with self.lock:
+            existing_id = self.fingerprints.get(fingerprint)
+            existing = self.jobs.get(existing_id)
+            
+            if existing:
+                if existing['status'] == 'in_progress':
+                    return existing_id, False
+                if (existing['status'] == 'completed' and
+                        time.time() - existing.get('completed_at', 0) <= window):
+                    return existing_id, False
+            
+            self.create_job(job_id, urls, fingerprint=fingerprint, **kwargs)
+            self.fingerprints[fingerprint] = job_id
+            return job_id, True
+    
     def get_job(self, job_id):
         """Retrieve job data by ID"""
         return self.jobs.get(job_id)
@@ -51,6 +115,21 @@ class JobManager:
         
         return True
     
+    def record_delta(self, job_id, carried_forward, change=None):
+        """Record how a delta job resolved one URL and any change against its base job"""
+        if job_id not in self.jobs or 'delta' not in self.jobs[job_id]:
+            return False
+        
+        delta = self.jobs[job_id]['delta']
+        if carried_forward:
+            delta['carried_forward'] += 1
+        else:
+            delta['rechecked'] += 1
+            
+        if change:
+            self.jobs[job_id]['changes'].append(change)
+        return True
+    
     def update_type_counts(self, job_id, type_value):
         """Update type counts for XML analysis jobs"""
         if job_id in self.jobs and 'type_counts' in self.jobs[job_id] and type_value:
@@ -79,6 +158,23 @@ class JobManager:
         """Mark a job as completed"""
         if job_id in self.jobs:
             self.jobs[job_id]['status'] = 'completed'
+            self.jobs[job_id]['completed_at'] = time.time()
+            return True
+        return False
+    
+    def set_archive(self, job_id, archive_path, message=""):
+        """Record the spooled ZIP file for an archive job"""
+        if job_id in self.jobs:
+            self.jobs[job_id]['archive_path'] = archive_path
+            self.jobs[job_id]['message'] = message
+            return True
+        return False
+    
+    def fail_job(self, job_id, error):
+        """Mark a job as failed with an error message"""
+        if job_id in self.jobs:
+            self.jobs[job_id]['status'] = 'failed'
+            self.jobs[job_id]['error'] = error
             return True
         return False
     
@@ -87,12 +183,17 @@ class JobManager:
         current_time = time.time()
         expired_jobs = []
         
-        for job_id, job_data in self.jobs.items():
-            if current_time - job_data.get('created_at', 0) > (hours * 3600):
-                expired_jobs.append(job_id)
-                
-        for job_id in expired_jobs:
-            del self.jobs[job_id]
+        # Hold the lock so a concurrent submission can't register a job mid-scan
+        with self.lock:
+            for job_id, job_data in self.jobs.items():
+                if current_time - job_data.get('created_at', 0) > (hours * 3600):
+                    expired_jobs.append(job_id)
+                    
+            for job_id in expired_jobs:
+                fingerprint = self.jobs[job_id].get('fingerprint')
+                if fingerprint and self.fingerprints.get(fingerprint) == job_id:
+                    del self.fingerprints[fingerprint]
+                del self.jobs[job_id]
             
         return len(expired_jobs)
 
@@ -1,8 +1,15 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, send_file
 import requests
 import io
+import os
+import uuid
 import zipfile
-from app.services.download_service import download_single_xml, create_zip_from_urls, get_filename_from_url
+import concurrent.futures
+from config import Config
+from app.models.job import job_manager, compute_job_fingerprint
+from app.services.download_service import (
+    download_single_xml, create_zip_from_urls, get_filename_from_url, spool_zip_from_urls, cleanup_spool
+)
 
 # 블루프린트 생성
 download_bp = Blueprint('download', __name__)
@@ -59,6 +66,102 @@ def create_zip():
         headers={'Content-Disposition': f'attachment; filename={zip_filename}'}
     )
 
+@download_bp.route('/start-zip', methods=['POST'])
+def start_zip():
+    """ZIP 파일 생성 작업을 백그라운드로 시작하고 작업 ID를 반환합니다."""
+    data = request.get_json()
+    
+    if not data or not data.get('urls'):
+        return jsonify({'error': 'No URLs provided'}), 400
+    
+    urls = data['urls']
+    filenames = data.get('filenames', {})
+    worker_count = data.get('workerCount', 5)
+    zip_filename = data.get('filename', 'xml_files.zip')
+    
+    # 만료된 스풀 파일 정리
+    cleanup_spool(Config.ZIP_SPOOL_TTL_HOURS)
+    
+    # Reuse a running or recently finished archive job for the same request
+    fingerprint = compute_job_fingerprint(
+        'archive', urls, {'filenames': filenames, 'filename': zip_filename},
+        request.headers.get('Idempotency-Key'), ordered=True
+    )
+    
+    # Generate a unique job ID
+    job_id, created = job_manager.find_or_create_job(
+        str(uuid.uuid4()), urls, fingerprint, Config.JOB_DEDUP_WINDOW_SECONDS, job_type="archive"
+    )
+    if not created:
+        return jsonify({
+            'job_id': job_id,
+            'status': job_manager.get_job(job_id)['status'],
+            'deduplicated': True,
+            'message': '동일한 ZIP 생성 작업이 이미 있어 기존 작업 ID를 반환합니다.'
+        })
+    
+    job_manager.get_job(job_id)['filename'] = zip_filename
+    
+    # Start background processing
+    def process_zip():
+        success, archive_path, message = spool_zip_from_urls(
+            job_id, urls, filenames, worker_count,
+            on_progress=lambda result: job_manager.update_job_progress(job_id, result)
+        )
+        
+        if not success:
+            job_manager.fail_job(job_id, message)
+            return
+        
+        job_manager.set_archive(job_id, archive_path, message)
+        job_manager.complete_job(job_id)
+    
+    # Start the background task
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    executor.submit(process_zip)
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'in_progress',
+        'message': 'ZIP 생성 작업이 시작되었습니다.'
+    })
+
+@download_bp.route('/download-zip/<job_id>', methods=['GET'])
+def download_zip(job_id):
+    """완료된 ZIP 생성 작업의 결과 파일을 전송합니다. Range 요청으로 이어받기를 지원합니다."""
+    job = job_manager.get_job(job_id)
+    
+    if not job or job.get('job_type') != 'archive':
+        return jsonify({'error': '존재하지 않는 작업 ID입니다.'}), 404
+    
+    if job['status'] == 'failed':
+        return jsonify({'error': job.get('error', 'ZIP 생성에 실패했습니다.')}), 400
+    
+    if job['status'] != 'completed':
+        return jsonify({
+            'error': 'ZIP 파일이 아직 준비되지 않았습니다.',
+            'completed': job['completed'],
+            'total': job['total']
+        }), 409
+    
+    # 만료된 스풀 파일 정리
+    cleanup_spool(Config.ZIP_SPOOL_TTL_HOURS)
+    
+    archive_path = job.get('archive_path')
+    if not archive_path or not os.path.exists(archive_path):
+        return jsonify({'error': 'ZIP 파일이 만료되었습니다. 다시 생성해 주세요.'}), 410
+    
+    # conditional=True enables Range/If-Range handling (206 responses), and the
+    # file is handed to the WSGI server's file_wrapper so gunicorn can use sendfile
+    return send_file(
+        archive_path,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=job.get('filename', 'xml_files.zip'),
+        conditional=True,
+        etag=True
+    )
+
 @download_bp.route('/download-status', methods=['GET'])
 def download_status():
     """다운로드 서비스 상태를 확인합니다."""
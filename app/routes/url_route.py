@@ -2,8 +2,12 @@ from flask import Blueprint, request, jsonify
 import uuid
 import concurrent.futures
 
-from app.models.job import job_manager
+from app.models.job import job_manager, compute_job_fingerprint
 from app.services.url_service import check_single_url
+from app.services.dns_service import partition_resolvable
+from app.services.delta_service import plan_delta, resolve_delta_result, VALIDATION_FIELDS
+from app.services.sampling_service import build_estimates
+from config import Config
 
 url_bp = Blueprint('url', __name__)
 
@@ -36,17 +40,66 @@ def start_validation():
             'error': 'URLs가 제공되지 않았습니다.'
         }), 400
     
-    # Generate a unique job ID
-    job_id = str(uuid.uuid4())
     urls = data['urls']
+    warm_connections = data.get('warmConnections', Config.DNS_WARM_CONNECTIONS) is True
+    hedge = data.get('hedge', Config.HEDGE_ENABLED) is True
     
-    # Initialize job in the job manager
-    job_manager.create_job(job_id, urls)
+    # Optional delta run against an earlier validation job
+    base_job_id = data.get('baseJobId')
+    base_results = None
+    validators = {}
+    
+    if base_job_id:
+        base_job = job_manager.get_job(base_job_id)
+        # Only plain URL validation jobs carry comparable results and validators
+        if not base_job or base_job['job_type'] != 'standard':
+            return jsonify({
+                'error': '존재하지 않는 기준 작업 ID입니다.'
+            }), 404
+        if base_job['status'] != 'completed':
+            return jsonify({
+                'error': '기준 작업이 아직 완료되지 않았습니다.'
+            }), 409
+        base_results, validators, removed = plan_delta(base_job, urls)
+    
+    # Reuse a running or recently finished job for the same URL list
+    fingerprint = compute_job_fingerprint(
+        'url_validation', urls, {'baseJobId': base_job_id}, request.headers.get('Idempotency-Key')
+    )
+    
+    # Initialize job in the job manager under a unique job ID
+    job_id, created = job_manager.find_or_create_job(
+        str(uuid.uuid4()), urls, fingerprint, Config.JOB_DEDUP_WINDOW_SECONDS, base_job_id=base_job_id
+    )
+    if not created:
+        return jsonify({
+            'job_id': job_id,
+            'status': job_manager.get_job(job_id)['status'],
+            'deduplicated': True,
+            'message': '동일한 검증 작업이 이미 있어 기존 작업 ID를 반환합니다.'
+        })
+    
+    if base_job_id:
+        job_manager.get_job(job_id)['changes'].extend(removed)
+    
+    def record_result(url, result):
+        # Compare against the base job and copy unchanged results forward
+        if base_results is not None:
+            result, carried_forward, change = resolve_delta_result(base_results.get(url), result, VALIDATION_FIELDS)
+            job_manager.record_delta(job_id, carried_forward, change)
+        job_manager.update_job_progress(job_id, result)
     
     # Start background processing
     def process_urls():
+        # Resolve every host up front; URLs on unresolvable hosts fail immediately
+        resolvable_urls, dns_failures = partition_resolvable(urls, warm_connections)
+        for result in dns_failures:
+            record_result(result['url'], result)
+        
         with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_url = {executor.submit(check_single_url, url): url for url in urls}
+            future_to_url = {
+                executor.submit(check_single_url, url, validators.get(url), hedge): url for url in resolvable_urls
+            }
             
             for future in concurrent.futures.as_completed(future_to_url):
                 url = future_to_url[future]
@@ -60,7 +113,7 @@ def start_validation():
                         'error': str(e)
                     }
                     
-                job_manager.update_job_progress(job_id, result)
+                record_result(url, result)
             
             # Mark job as complete
             job_manager.complete_job(job_id)
@@ -86,6 +139,14 @@ def job_status(job_id):
             'error': '존재하지 않는 작업 ID입니다.'
         }), 404
     
+    # If job failed, return the error with partial results
+    if job['status'] == 'failed':
+        return jsonify({
+            'status': 'failed',
+            'error': job.get('error', ''),
+            'results': job['results']
+        })
+    
     # If job is complete, return full results
     if job['status'] == 'completed':
         response_data = {
@@ -97,6 +158,20 @@ def job_status(job_id):
         # Include type counts if available
         if 'type_counts' in job:
             response_data['type_counts'] = job['type_counts']
+        
+        # Include (now exact) estimates for sampling analysis jobs
+        if 'sampling' in job:
+            response_data['estimates'] = build_estimates(job)
+        
+        # Include the delta summary and changed rows for delta jobs
+        if 'delta' in job:
+            response_data['delta'] = job['delta']
+            response_data['changes'] = job['changes']
+        
+        # Include download location for archive jobs
+        if job.get('job_type') == 'archive':
+            response_data['download_url'] = f'/download-zip/{job_id}'
+            response_data['message'] = job.get('message', '')
             
         return jsonify(response_data)
     
@@ -113,6 +188,12 @@ def job_status(job_id):
     # Include partial type counts if available
     if 'type_counts' in job:
         response_data['type_counts'] = job['type_counts']
+    
+    # Include estimated distributions with confidence intervals for sampling jobs
+    if 'sampling' in job:
+        estimates = build_estimates(job)
+        if estimates:
+            response_data['estimates'] = estimates
         
     return jsonify(response_data)
 
@@ -121,9 +202,13 @@ def cleanup_jobs():
     """Remove old jobs to free up memory"""
     from config import Config
     
+    from app.services.download_service import cleanup_spool
+    
     removed_count = job_manager.cleanup_old_jobs(Config.JOB_CLEANUP_HOURS)
+    removed_files = cleanup_spool(Config.ZIP_SPOOL_TTL_HOURS)
     
     return jsonify({
         'message': f'작업 정리가 완료되었습니다. {removed_count}개 작업이 삭제됨.',
-        'jobs_remaining': len(job_manager.jobs)
+        'jobs_remaining': len(job_manager.jobs),
+        'spool_files_removed': removed_files
     })
\ No newline at end of file
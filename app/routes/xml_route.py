@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
 import uuid
+import random
 import concurrent.futures
 
-from app.models.job import job_manager
-from app.services.xml_service import check_xml_url, analyze_xml_content
+from app.models.job import job_manager, compute_job_fingerprint
+from app.services.xml_service import check_xml_url, iter_xml_analysis
+from app.services.dns_service import partition_resolvable
+from app.services.delta_service import plan_delta, resolve_delta_result, XML_ANALYSIS_FIELDS
+from config import Config
 
 xml_bp = Blueprint('xml', __name__)
 
@@ -17,17 +21,33 @@ def start_xml_validation():
             'error': 'URLs가 제공되지 않았습니다.'
         }), 400
     
-    # Generate a unique job ID
-    job_id = str(uuid.uuid4())
     urls = data['urls']
+    warm_connections = data.get('warmConnections', Config.DNS_WARM_CONNECTIONS) is True
     
-    # Initialize job in the job manager
-    job_manager.create_job(job_id, urls)
+    # Reuse a running or recently finished job for the same URL list
+    fingerprint = compute_job_fingerprint('xml_validation', urls, idempotency_key=request.headers.get('Idempotency-Key'))
+    
+    # Initialize job in the job manager (with xml_validation type) under a unique job ID
+    job_id, created = job_manager.find_or_create_job(
+        str(uuid.uuid4()), urls, fingerprint, Config.JOB_DEDUP_WINDOW_SECONDS, job_type="xml_validation"
+    )
+    if not created:
+        return jsonify({
+            'job_id': job_id,
+            'status': job_manager.get_job(job_id)['status'],
+            'deduplicated': True,
+            'message': '동일한 XML 검증 작업이 이미 있어 기존 작업 ID를 반환합니다.'
+        })
     
     # Start background processing
     def process_xml_urls():
+        # Resolve every host up front; URLs on unresolvable hosts fail immediately
+        resolvable_urls, dns_failures = partition_resolvable(urls, warm_connections)
+        for result in dns_failures:
+            job_manager.update_job_progress(job_id, result)
+        
         with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_url = {executor.submit(check_xml_url, url): url for url in urls}
+            future_to_url = {executor.submit(check_xml_url, url): url for url in resolvable_urls}
             
             for future in concurrent.futures.as_completed(future_to_url):
                 url = future_to_url[future]
@@ -67,85 +87,143 @@ def analyze_xml_types():
             'error': 'URLs가 제공되지 않았습니다.'
         }), 400
     
-    # Generate a unique job ID
-    job_id = str(uuid.uuid4())
     urls = data['urls']
+    warm_connections = data.get('warmConnections', Config.DNS_WARM_CONNECTIONS) is True
+    sampling = data.get('sampling', False) is True
+    hedge = data.get('hedge', Config.HEDGE_ENABLED) is True
+    
+    # Optional delta run against an earlier analysis job
+    base_job_id = data.get('baseJobId')
+    base_results = None
+    validators = {}
+    
+    if base_job_id:
+        base_job = job_manager.get_job(base_job_id)
+        if not base_job or base_job['job_type'] != 'xml_analysis':
+            return jsonify({
+                'error': '존재하지 않는 기준 작업 ID입니다.'
+            }), 404
+        if base_job['status'] != 'completed':
+            return jsonify({
+                'error': '기준 작업이 아직 완료되지 않았습니다.'
+            }), 409
+        base_results, validators, removed = plan_delta(base_job, urls)
     
-    # Initialize job in the job manager (with xml_analysis type)
-    job_manager.create_job(job_id, urls, job_type="xml_analysis")
+    # Reuse a running or recently finished job for the same URL list
+    fingerprint = compute_job_fingerprint(
+        'xml_analysis', urls, {'baseJobId': base_job_id, 'sampling': sampling},
+        request.headers.get('Idempotency-Key')
+    )
+    
+    # Initialize job in the job manager (with xml_analysis type) under a unique job ID
+    job_id, created = job_manager.find_or_create_job(
+        str(uuid.uuid4()), urls, fingerprint, Config.JOB_DEDUP_WINDOW_SECONDS,
+        job_type="xml_analysis", base_job_id=base_job_id, sampling=sampling
+    )
+    if not created:
+        return jsonify({
+            'job_id': job_id,
+            'status': job_manager.get_job(job_id)['status'],
+            'deduplicated': True,
+            'message': '동일한 XML 태그 분석 작업이 이미 있어 기존 작업 ID를 반환합니다.'
+        })
+    
+    if base_job_id:
+        job_manager.get_job(job_id)['changes'].extend(removed)
+    
+    def apply_delta(url, result):
+        # Compare against the base job and copy unchanged results forward
+        if base_results is None:
+            return result
+        result, carried_forward, change = resolve_delta_result(base_results.get(url), result, XML_ANALYSIS_FIELDS)
+        job_manager.record_delta(job_id, carried_forward, change)
+        return result
     
     # Start background processing
     def process_xml_analysis():
         valid_xmls = []
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_url = {executor.submit(analyze_xml_content, url): url for url in urls}
-            
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    result = future.result()
+        # Resolve every host up front; URLs on unresolvable hosts fail immediately
+        resolvable_urls, dns_failures = partition_resolvable(urls, warm_connections)
+        
+        # Exclude DNS failures from the sample before they show up in 'completed'
+        if sampling:
+            job_manager.get_job(job_id)['sampling']['excluded'] = len(dns_failures)
+        
+        for result in dns_failures:
+            job_manager.update_job_progress(job_id, apply_delta(result['url'], result))
+        
+        # Process URLs in random order so every prefix of completed results is a
+        # random sample and the estimated distributions tighten as the job runs
+        if sampling:
+            random.shuffle(resolvable_urls)
+        
+        # Fetch in I/O threads, parse in the process pool
+        for result in iter_xml_analysis(resolvable_urls, validators, hedge):
+            url = result['url']
+            try:
+                result = apply_delta(url, result)
+                
+                # Update counts for each tag if valid XML
+                if result['isValid']:
+                    # Update type counts
+                    if 'type_value' in result and result['type_value']:
+                        job_manager.update_type_counts(job_id, result['type_value'])
+                    
+                    # Update style counts
+                    if 'style_content' in result and result['style_content']:
+                        job_manager.update_style_counts(job_id, result['style_content'])
                     
-                    # Update counts for each tag if valid XML
-                    if result['isValid']:
-                        # Update type counts
-                        if 'type_value' in result and result['type_value']:
-                            job_manager.update_type_counts(job_id, result['type_value'])
+                    # Update COURSE_CODE counts
+                    if 'course_code' in result and result['course_code']:
+                        job_manager.update_tag_counts(job_id, 'course_code', result['course_code'])
                         
-                        # Update style counts
-                        if 'style_content' in result and result['style_content']:
-                            job_manager.update_style_counts(job_id, result['style_content'])
+                    # Update GRADE counts
+                    if 'grade' in result and result['grade']:
+                        job_manager.update_tag_counts(job_id, 'grade', result['grade'])
                         
-                        # Update COURSE_CODE counts
-                        if 'course_code' in result and result['course_code']:
-                            job_manager.update_tag_counts(job_id, 'course_code', result['course_code'])
-                            
-                        # Update GRADE counts
-                        if 'grade' in result and result['grade']:
-                            job_manager.update_tag_counts(job_id, 'grade', result['grade'])
-                            
-                        # Update SESSION counts  
-                        if 'session' in result and result['session']:
-                            job_manager.update_tag_counts(job_id, 'session', result['session'])
-                            
-                        # Update UNIT counts
-                        if 'unit' in result and result['unit']:
-                            job_manager.update_tag_counts(job_id, 'unit', result['unit'])
-                            
-                        # Update PERIOD counts
-                        if 'period' in result and result['period']:
-                            job_manager.update_tag_counts(job_id, 'period', result['period'])
-                            
-                        # Update ORDER counts
-                        if 'order' in result and result['order']:
-                            job_manager.update_tag_counts(job_id, 'order', result['order'])
-                            
-                        # Update STUDY counts
-                        if 'study' in result and result['study']:
-                            job_manager.update_tag_counts(job_id, 'study', result['study'])
-                            
-                        # Update STUDY counts
-                        if 'step' in result and result['step']:
-                            job_manager.update_tag_counts(job_id, 'step', result['step'])
-                            
-                        # Update STUDY counts
-                        if 'day' in result and result['day']:
-                            job_manager.update_tag_counts(job_id, 'day', result['day'])
-                                                        
-                        valid_xmls.append(result)
+                    # Update SESSION counts  
+                    if 'session' in result and result['session']:
+                        job_manager.update_tag_counts(job_id, 'session', result['session'])
                         
-                except Exception as e:
-                    result = {
-                        'url': url,
-                        'isValid': False,
-                        'statusCode': 0,
-                        'error': str(e)
-                    }
+                    # Update UNIT counts
+                    if 'unit' in result and result['unit']:
+                        job_manager.update_tag_counts(job_id, 'unit', result['unit'])
+                        
+                    # Update PERIOD counts
+                    if 'period' in result and result['period']:
+                        job_manager.update_tag_counts(job_id, 'period', result['period'])
+                        
+                    # Update ORDER counts
+                    if 'order' in result and result['order']:
+                        job_manager.update_tag_counts(job_id, 'order', result['order'])
+                        
+                    # Update STUDY counts
+                    if 'study' in result and result['study']:
+                        job_manager.update_tag_counts(job_id, 'study', result['study'])
+                        
+                    # Update STUDY counts
+                    if 'step' in result and result['step']:
+                        job_manager.update_tag_counts(job_id, 'step', result['step'])
+                        
+                    # Update STUDY counts
+                    if 'day' in result and result['day']:
+                        job_manager.update_tag_counts(job_id, 'day', result['day'])
+                                                    
+                    valid_xmls.append(result)
                     
-                job_manager.update_job_progress(job_id, result)
+            except Exception as e:
+                result = apply_delta(url, {
+                    'url': url,
+                    'isValid': False,
+                    'statusCode': 0,
+                    'error': str(e)
+                })
                 
-            # Mark job as complete
-            job_manager.complete_job(job_id)
+            job_manager.update_job_progress(job_id, result)
+            
+        # Mark job as complete
+        job_manager.complete_job(job_id)
     
     # Start the background task
     executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
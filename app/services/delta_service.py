@@ -0,0 +1,68 @@
+# Result fields compared between a delta job and its base job
+VALIDATION_FIELDS = ('isValid', 'statusCode')
+XML_ANALYSIS_FIELDS = (
+    'isValid', 'statusCode', 'course_code', 'grade', 'session', 'unit', 'period',
+    'order', 'study', 'type_value', 'style_content', 'step', 'day'
+)
+
+def plan_delta(base_job, urls):
+    """
+    Work out what a delta job against a finished base job has to re-check.
+    
+    URLs that failed last time or are new get a full check. URLs that were valid
+    and carried an ETag/Last-Modified get a conditional request, so an unchanged
+    resource can be copied forward from the base results.
+    
+    Args:
+        base_job (dict): The completed base job
+        urls (list): URL list for the new job
+        
+    Returns:
+        tuple: (base results by URL, validators by URL, changes for removed URLs)
+    """
+    base_results = {result['url']: result for result in base_job['results']}
+    
+    validators = {}
+    for url, result in base_results.items():
+        if not result.get('isValid'):
+            continue
+        url_validators = {key: result[key] for key in ('etag', 'lastModified') if result.get(key)}
+        if url_validators:
+            validators[url] = url_validators
+    
+    url_set = set(urls)
+    removed = [{'url': url, 'change': 'removed'} for url in base_results if url not in url_set]
+    
+    return base_results, validators, removed
+
+def resolve_delta_result(previous, result, fields):
+    """
+    Merge a fresh result with the base job's result for the same URL.
+    
+    Args:
+        previous (dict or None): Base job result, None for URLs new in this job
+        result (dict): Result of the check made by the delta job
+        fields (tuple): Result fields to compare
+        
+    Returns:
+        tuple: (final result, whether it was carried forward, change entry or None)
+    """
+    if previous is None:
+        return result, False, {'url': result['url'], 'change': 'added'}
+    
+    # Validators say nothing changed - keep the previous result
+    if result.get('notModified'):
+        carried = dict(previous)
+        carried['carriedForward'] = True
+        return carried, True, None
+    
+    changed_fields = {
+        field: {'before': previous.get(field), 'after': result.get(field)}
+        for field in fields
+        if previous.get(field) != result.get(field)
+    }
+    
+    if not changed_fields:
+        return result, False, None
+        
+    return result, False, {'url': result['url'], 'change': 'changed', 'fields': changed_fields}
\ No newline at end of file
@@ -0,0 +1,179 @@
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from urllib3.util.connection import allowed_gai_family
+from requests.utils import get_environ_proxies, select_proxy
+from config import Config
+from app.services.http_service import session, warm_connection
+
+_system_getaddrinfo = socket.getaddrinfo
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+class DNSCache:
+    """In-process cache for getaddrinfo results shared by all request threads"""
+    
+    def __init__(self, ttl, negative_ttl):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+    
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Drop-in replacement for socket.getaddrinfo that serves cached answers"""
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        
+        with self.lock:
+            entry = self.entries.get(key)
+            
+        if entry and entry[0] > now:
+            answer = entry[1]
+            if isinstance(answer, socket.gaierror):
+                raise socket.gaierror(*answer.args)
+            return list(answer)
+        
+        try:
+            answer = _system_getaddrinfo(host, port, family, type, proto, flags)
+        except socket.gaierror as e:
+            # Cache failures briefly so every URL on a dead host fails fast
+            with self.lock:
+                self.entries[key] = (now + self.negative_ttl, e)
+            raise
+        
+        with self.lock:
+            self.entries[key] = (now + self.ttl, answer)
+        return list(answer)
+    
+    def resolve(self, host, port):
+        """Resolve a host the same way urllib3 will, so the answer lands in the cache"""
+        return self.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+    
+    def prune(self):
+        """Remove expired entries"""
+        now = time.monotonic()
+        with self.lock:
+            expired = [key for key, entry in self.entries.items() if entry[0] <= now]
+            for key in expired:
+                del self.entries[key]
+        return len(expired)
+    
+    def install(self):
+        """Route all socket.getaddrinfo calls in this process through the cache"""
+        socket.getaddrinfo = self.getaddrinfo
+
+# Singleton instance
+dns_cache = DNSCache(Config.DNS_CACHE_TTL, Config.DNS_NEGATIVE_TTL)
+
+def get_host_key(url):
+    """
+    Extract the (scheme, host, port) triple used to group URLs by origin.
+    
+    Args:
+        url (str): The URL
+        
+    Returns:
+        tuple or None: (scheme, host, port), or None if the URL has no host
+    """
+    try:
+        parts = urlsplit(url.strip())
+        if not parts.hostname:
+            return None
+        port = parts.port or DEFAULT_PORTS.get(parts.scheme.lower())
+        return parts.scheme.lower(), parts.hostname, port
+    except (ValueError, AttributeError):
+        return None
+
+def uses_proxy(host_key):
+    """
+    Check whether the shared session would send requests for this origin through
+    a proxy, using the same proxy/NO_PROXY resolution requests applies.
+    
+    Args:
+        host_key (tuple): (scheme, host, port)
+        
+    Returns:
+        bool: True if a proxy (not this process) resolves the host
+    """
+    scheme, host, port = host_key
+    url = f"{scheme}://{host}:{port}/"
+    
+    proxies = {}
+    if session.trust_env:
+        proxies.update(get_environ_proxies(url, no_proxy=session.proxies.get('no_proxy')))
+    proxies.update(session.proxies)
+    
+    return select_proxy(url, proxies) is not None
+
+def prewarm_hosts(urls, warm_connections=False):
+    """
+    Resolve the unique hosts of a URL list in parallel before URL work starts.
+    
+    Origins reached through a proxy are skipped: only the proxy resolves them.
+    
+    Args:
+        urls (list): URLs the job is about to process
+        warm_connections (bool): Also open one pooled connection per resolved host
+        
+    Returns:
+        dict: (scheme, host, port) to error message for every directly
+            connected origin whose host failed to resolve
+    """
+    dns_cache.prune()
+    
+    host_keys = {key for key in map(get_host_key, urls) if key and not uses_proxy(key)}
+    if not host_keys:
+        return {}
+    
+    def resolve_job(host_key):
+        scheme, host, port = host_key
+        try:
+            dns_cache.resolve(host, port)
+        except socket.gaierror as e:
+            return host_key, str(e)
+        
+        if warm_connections:
+            warm_connection(scheme, host, port)
+        return host_key, None
+    
+    failed_hosts = {}
+    with ThreadPoolExecutor(max_workers=min(Config.DNS_PREWARM_WORKERS, len(host_keys))) as executor:
+        for host_key, error in executor.map(resolve_job, host_keys):
+            if error:
+                failed_hosts[host_key] = error
+    
+    return failed_hosts
+
+def partition_resolvable(urls, warm_connections=False):
+    """
+    Split a URL list into URLs worth requesting and ready-made failure results
+    for URLs whose host could not be resolved.
+    
+    Args:
+        urls (list): URLs the job is about to process
+        warm_connections (bool): Also open one pooled connection per resolved host
+        
+    Returns:
+        tuple: (resolvable URLs, list of failure results)
+    """
+    failed_hosts = prewarm_hosts(urls, warm_connections)
+    if not failed_hosts:
+        return list(urls), []
+    
+    resolvable = []
+    failures = []
+    for url in urls:
+        host_key = get_host_key(url)
+        if host_key in failed_hosts:
+            failures.append({
+                'url': url,
+                'isValid': False,
+                'statusCode': 0,
+                'error': f'DNS 조회 실패: {failed_hosts[host_key]}'
+            })
+        else:
+            resolvable.append(url)
+    
+    return resolvable, failures
\ No newline at end of file
@@ -1,8 +1,12 @@
-import requests
 import io
+import os
+import time
+import threading
 import zipfile
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Callable, Optional
+from config import Config
+from app.services.http_service import session
 
 def download_single_xml(url: str, timeout: int = 10) -> Tuple[bool, bytes, str]:
     """
@@ -16,7 +20,7 @@ def download_single_xml(url: str, timeout: int = 10) -> Tuple[bool, bytes, str]:
         (성공 여부, 콘텐츠, 오류 메시지)
     """
     try:
-        response = requests.get(url, timeout=timeout)
+        response = session.get(url, timeout=timeout)
         if response.status_code == 200:
             return True, response.content, ""
         else:
@@ -54,17 +58,7 @@ def create_zip_from_urls(urls: List[str], filenames: Dict[str, str] = None, work
         idx, url = idx_url
         success, content, error = download_single_xml(url)
         if success:
-            # 사용자 정의 파일명 사용
-            custom_filename = filenames.get(url)
-            if custom_filename:
-                filename = f"{idx+1:03d}_{custom_filename}"  # 순서 번호를 앞에 추가 (001_, 002_, ...)
-            else:
-                # 기본 파일명 생성
-                base_filename = url.split('/')[-1]
-                if not base_filename.endswith('.xml'):
-                    base_filename = f"file_{idx}.xml"
-                filename = f"{idx+1:03d}_{base_filename}"  # 순서 번호를 앞에 추가 (001_, 002_, ...)
-            return idx, url, success, content, filename, ""
+            return idx, url, success, content, get_archive_entry_name(idx, url, filenames), ""
         else:
             return idx, url, False, b"", "", error
     
@@ -121,4 +115,168 @@ def get_filename_from_url(url: str, default_name: str = "file.xml") -> str:
             return default_name
         return filename
     except:
-        return default_name
\ No newline at end of file
+        return default_name
+
+def get_archive_entry_name(idx: int, url: str, filenames: Dict[str, str]) -> str:
+    """
+    ZIP 내부에 저장될 파일명을 생성합니다.
+    
+    Args:
+        idx: URL 목록에서의 순서 (0부터 시작)
+        url: 파일 URL
+        filenames: URL을 키로 사용하는 사용자 정의 파일명 딕셔너리
+    
+    Returns:
+        순서 번호가 붙은 파일명 (001_, 002_, ...)
+    """
+    # 사용자 정의 파일명 사용
+    custom_filename = filenames.get(url)
+    if custom_filename:
+        return f"{idx+1:03d}_{custom_filename}"
+    
+    # 기본 파일명 생성
+    base_filename = url.split('/')[-1]
+    if not base_filename.endswith('.xml'):
+        base_filename = f"file_{idx}.xml"
+    return f"{idx+1:03d}_{base_filename}"
+
+def get_spool_path(job_id: str) -> str:
+    """
+    작업 ID에 해당하는 스풀 ZIP 파일 경로를 반환합니다.
+    
+    Args:
+        job_id: 아카이브 작업 ID
+    
+    Returns:
+        스풀 디렉터리 안의 ZIP 파일 경로
+    """
+    return os.path.join(Config.ZIP_SPOOL_DIR, f"{job_id}.zip")
+
+def spool_zip_from_urls(job_id: str, urls: List[str], filenames: Dict[str, str] = None, worker_count: int = 5,
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[bool, str, str]:
+    """
+    여러 URL에서 XML 파일을 다운로드하여 스풀 디렉터리에 ZIP 파일을 생성합니다.
+    
+    다운로드가 끝나는 순서대로 ZIP에 기록하므로 전체 콘텐츠를 메모리에 모아두지 않습니다.
+    작성 중에는 임시 파일(.part)을 사용하고, 완료된 뒤에만 최종 경로로 옮깁니다.
+    
+    Args:
+        job_id: 아카이브 작업 ID (스풀 파일명으로 사용)
+        urls: 다운로드할 XML 파일들의 URL 목록
+        filenames: URL을 키로 사용하고 사용자 정의 파일명을 값으로 사용하는 딕셔너리
+        worker_count: 동시 다운로드 작업자 수
+        on_progress: URL 하나가 처리될 때마다 결과 딕셔너리와 함께 호출되는 콜백
+    
+    Returns:
+        (성공 여부, ZIP 파일 경로, 메시지)
+    """
+    if not urls:
+        return False, "", "No URLs provided"
+    
+    if filenames is None:
+        filenames = {}
+    
+    os.makedirs(Config.ZIP_SPOOL_DIR, exist_ok=True)
+    final_path = get_spool_path(job_id)
+    part_path = f"{final_path}.part"
+    
+    success_count = 0
+    failure_count = 0
+    
+    try:
+        with ThreadPoolExecutor(max_workers=worker_count) as executor, \
+                zipfile.ZipFile(part_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            future_to_idx = {executor.submit(download_single_xml, url): idx for idx, url in enumerate(urls)}
+            
+            for future in as_completed(future_to_idx):
+                idx = future_to_idx[future]
+                url = urls[idx]
+                success, content, error = future.result()
+                
+                result = {'url': url, 'success': success}
+                if success:
+                    filename = get_archive_entry_name(idx, url, filenames)
+                    zf.writestr(filename, content)
+                    result['filename'] = filename
+                    success_count += 1
+                else:
+                    result['error'] = error
+                    failure_count += 1
+                    print(f"Error processing URL {url}: {error}")
+                
+                if on_progress:
+                    on_progress(result)
+    except Exception as e:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return False, "", f"Error creating ZIP: {str(e)}"
+    
+    # 하나도 성공하지 못한 경우
+    if success_count == 0:
+        os.remove(part_path)
+        return False, "", f"Failed to download any XML files. {failure_count} failures."
+    
+    os.replace(part_path, final_path)
+    
+    message = ""
+    if failure_count > 0:
+        message = f"Downloaded {success_count} files. {failure_count} files failed."
+    
+    return True, final_path, message
+
+def cleanup_spool(hours: float) -> int:
+    """
+    지정된 시간보다 오래된 스풀 ZIP 파일을 삭제합니다.
+    
+    Args:
+        hours: 스풀 파일 보관 시간(시간 단위)
+    
+    Returns:
+        삭제된 파일 수
+    """
+    if not os.path.isdir(Config.ZIP_SPOOL_DIR):
+        return 0
+    
+    cutoff = time.time() - (hours * 3600)
+    removed = 0
+    
+    for name in os.listdir(Config.ZIP_SPOOL_DIR):
+        path = os.path.join(Config.ZIP_SPOOL_DIR, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            # 다른 워커가 이미 삭제한 경우
+            continue
+    
+    return removed
+
+_spool_janitor_started = False
+
+def start_spool_janitor(hours: float, interval: float) -> bool:
+    """
+    만료된 스풀 ZIP 파일을 주기적으로 삭제하는 데몬 스레드를 시작합니다.
+    
+    Args:
+        hours: 스풀 파일 보관 시간(시간 단위)
+        interval: 정리 주기(초)
+    
+    Returns:
+        새로 시작했으면 True, 이미 실행 중이면 False
+    """
+    global _spool_janitor_started
+    if _spool_janitor_started:
+        return False
+    _spool_janitor_started = True
+    
+    def janitor():
+        while True:
+            time.sleep(interval)
+            try:
+                cleanup_spool(hours)
+            except Exception as e:
+                print(f"Error cleaning up ZIP spool: {str(e)}")
+    
+    threading.Thread(target=janitor, name='zip-spool-janitor', daemon=True).start()
+    return True
\ No newline at end of file
@@ -0,0 +1,257 @@
+import requests
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from config import Config
+
+def _create_session():
+    """
+    Create the pooled session shared by all URL checking threads.
+    
+    Returns:
+        requests.Session: Session with keep-alive connection pools per host
+    """
+    shared = requests.Session()
+    
+    # URLs from different sheets must not leak cookies into each other
+    shared.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    
+    adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_HOSTS, pool_maxsize=Config.MAX_WORKERS)
+    shared.mount('http://', adapter)
+    shared.mount('https://', adapter)
+    return shared
+
+# Singleton instance
+session = _create_session()
+
+def warm_connection(scheme, host, port):
+    """
+    Send a HEAD request to the host through the shared session so the first
+    real request can reuse a pooled connection and skip the TCP/TLS handshake.
+    
+    Args:
+        scheme (str): 'http' or 'https'
+        host (str): Host name
+        port (int): Port number
+        
+    Returns:
+        bool: True if the host answered
+    """
+    try:
+        # Body-less response is read fully, so the connection goes back to the pool
+        session.head(f"{scheme}://{host}:{port}/", timeout=Config.REQUEST_TIMEOUT)
+        return True
+    except Exception:
+        return False
+
+def get_validators(response):
+    """
+    Extract cache validators from a response.
+    
+    Args:
+        response (requests.Response): The response
+        
+    Returns:
+        dict: 'etag' and/or 'lastModified' values that were present
+    """
+    validators = {}
+    if response.headers.get('ETag'):
+        validators['etag'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        validators['lastModified'] = response.headers['Last-Modified']
+    return validators
+
+def build_conditional_headers(validators):
+    """
+    Build If-None-Match / If-Modified-Since headers from stored validators.
+    
+    Args:
+        validators (dict): Validators as returned by get_validators
+        
+    Returns:
+        dict: Request headers (empty if there is nothing to validate against)
+    """
+    headers = {}
+    if not validators:
+        return headers
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('lastModified'):
+        headers['If-Modified-Since'] = validators['lastModified']
+    return headers
+
+class LatencyTracker:
+    """Keeps a sliding window of recent response times for the most recently used hosts"""
+    
+    def __init__(self, window, min_samples, max_hosts):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_hosts = max_hosts
+        self.samples = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def record(self, host, latency):
+        """Add one observed response time (seconds) for a host"""
+        with self.lock:
+            if host in self.samples:
+                self.samples.move_to_end(host)
+            else:
+                self.samples[host] = deque(maxlen=self.window)
+                # Forget the least recently used host once the cap is reached
+                if len(self.samples) > self.max_hosts:
+                    self.samples.popitem(last=False)
+            self.samples[host].append(latency)
+    
+    def percentile(self, host, percentile):
+        """Return the host's latency percentile, or None until enough samples exist"""
+        with self.lock:
+            samples = sorted(self.samples[host]) if host in self.samples else []
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+class HedgeBudget:
+    """Token bucket bounding how many hedge requests go out relative to normal ones"""
+    
+    def __init__(self, ratio, burst, max_in_flight):
+        self.ratio = ratio
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.tokens = burst
+        self.in_flight = 0
+        self.lock = threading.Lock()
+    
+    def on_request(self):
+        """Earn a fraction of a hedge for every primary request"""
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+    
+    def try_acquire(self):
+        """Take one hedge if the budget and the in-flight cap allow it"""
+        with self.lock:
+            if self.tokens >= 1 and self.in_flight < self.max_in_flight:
+                self.tokens -= 1
+                self.in_flight += 1
+                return True
+            return False
+    
+    def release(self):
+        """Return the in-flight slot once a hedge request finishes"""
+        with self.lock:
+            self.in_flight -= 1
+
+# Singleton instances
+latency_tracker = LatencyTracker(Config.HEDGE_WINDOW, Config.HEDGE_MIN_SAMPLES, Config.HEDGE_MAX_TRACKED_HOSTS)
+hedge_budget = HedgeBudget(Config.HEDGE_BUDGET_RATIO, Config.HEDGE_BUDGET_BURST, Config.HEDGE_MAX_IN_FLIGHT)
+_primary_executor = ThreadPoolExecutor(max_workers=Config.HEDGE_POOL_SIZE)
+# Free primary threads; when none is left the request runs unhedged in the caller
+_primary_slots = threading.BoundedSemaphore(Config.HEDGE_POOL_SIZE)
+# Hedges get their own threads so they never queue behind primary requests
+_hedge_executor = ThreadPoolExecutor(max_workers=Config.HEDGE_MAX_IN_FLIGHT)
+
+def _timed_request(method, url, host, kwargs, record=True):
+    """Send one request through the shared session and record its latency"""
+    if not record:
+        return session.request(method, url, **kwargs)
+    
+    start = time.monotonic()
+    try:
+        response = session.request(method, url, **kwargs)
+    except requests.Timeout:
+        # Stragglers count at (at least) the timeout, or the percentile reads low
+        elapsed = time.monotonic() - start
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, (int, float)):
+            elapsed = max(elapsed, timeout)
+        latency_tracker.record(host, elapsed)
+        raise
+    latency_tracker.record(host, time.monotonic() - start)
+    return response
+
+def _close_response(future):
+    """Release the connection held by a losing hedge attempt"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def fetch(method, url, hedge=None, **kwargs):
+    """
+    Send a request through the shared session, optionally hedged.
+    
+    With hedging on, once the request has taken longer than the host's
+    HEDGE_PERCENTILE latency a second identical request is sent and whichever
+    response arrives first is returned. Hedges are capped globally by the
+    hedge budget, so origin load stays bounded. When all HEDGE_POOL_SIZE
+    primary threads are busy, the request is sent unhedged from the calling
+    thread instead of waiting for one.
+    
+    Args:
+        method (str): HTTP method
+        url (str): The URL
+        hedge (bool, optional): Enable hedging; defaults to Config.HEDGE_ENABLED
+        **kwargs: Passed to requests.Session.request
+        
+    Returns:
+        requests.Response: The first response to arrive
+    """
+    if hedge is None:
+        hedge = Config.HEDGE_ENABLED
+    
+    host = urlsplit(url).hostname
+    threshold = latency_tracker.percentile(host, Config.HEDGE_PERCENTILE) if hedge else None
+    timeout = kwargs.get('timeout')
+    
+    # Not enough history for this host yet, or a hedge couldn't beat the timeout
+    if threshold is None or (timeout is not None and threshold >= timeout):
+        # Latency history is only kept for hosts fetched in hedged mode
+        return _timed_request(method, url, host, kwargs, record=hedge)
+    
+    # Primary pool saturated - don't make this job wait behind other jobs' stragglers
+    if not _primary_slots.acquire(blocking=False):
+        return _timed_request(method, url, host, kwargs)
+    
+    hedge_budget.on_request()
+    started = threading.Event()
+    
+    def run_primary():
+        started.set()
+        try:
+            return _timed_request(method, url, host, kwargs)
+        finally:
+            _primary_slots.release()
+    
+    try:
+        primary = _primary_executor.submit(run_primary)
+    except Exception:
+        _primary_slots.release()
+        raise
+    
+    # Start the hedge timer only once the request is actually on the wire,
+    # not while it waits for a free thread in the primary pool
+    started.wait()
+    done, _ = wait([primary], timeout=threshold)
+    if done or not hedge_budget.try_acquire():
+        return primary.result()
+    
+    secondary = _hedge_executor.submit(_timed_request, method, url, host, kwargs)
+    secondary.add_done_callback(lambda f: hedge_budget.release())
+    
+    attempts = [primary, secondary]
+    winner = None
+    for future in as_completed(attempts):
+        if future.exception() is None:
+            winner = future
+            break
+    
+    # Both attempts failed - surface the original request's error
+    if winner is None:
+        return primary.result()
+    
+    for future in attempts:
+        if future is not winner:
+            future.add_done_callback(_close_response)
+    return winner.result()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import math
+from statistics import NormalDist
+from config import Config
+
+def estimate_counts(counts, sampled, population, confidence):
+    """
+    Estimate population-wide counts from counts observed in a random sample.
+    
+    Uses a Wilson score interval with a finite population correction, clamped to
+    what is still possible given the rows not yet processed. Once every row has
+    been processed the interval collapses to the exact count.
+    
+    Args:
+        counts (dict): Observed count per value in the sample
+        sampled (int): Number of rows processed so far
+        population (int): Total number of rows
+        confidence (float): Confidence level of the interval, e.g. 0.95
+        
+    Returns:
+        dict: Value to {'estimate', 'low', 'high'}
+    """
+    remaining = max(population - sampled, 0)
+    if sampled <= 0:
+        return {}
+    
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    fpc = math.sqrt(remaining / (population - 1)) if population > 1 else 0.0
+    
+    estimates = {}
+    for value, observed in list(counts.items()):
+        # Counters are bumped just before 'completed', so a poll can see one extra row
+        observed = min(observed, sampled)
+        p = observed / sampled
+        denominator = 1 + z * z / sampled
+        center = (p + z * z / (2 * sampled)) / denominator
+        half_width = z * math.sqrt(p * (1 - p) / sampled + z * z / (4 * sampled * sampled)) / denominator
+        
+        # Shrink the Wilson bounds toward p as the unprocessed share of rows shrinks
+        p_low = p - (p - (center - half_width)) * fpc
+        p_high = p + ((center + half_width) - p) * fpc
+        
+        # The true count can't be below what we've seen or above seen + unseen rows
+        low = max(observed, math.floor(p_low * population))
+        high = min(observed + remaining, math.ceil(p_high * population))
+        estimate = min(max(round(p * population), low), high)
+        
+        estimates[value] = {'estimate': estimate, 'low': low, 'high': high}
+    
+    return estimates
+
+def build_estimates(job):
+    """
+    Build the estimated type/tag distributions for a sampling analysis job.
+    
+    Rows resolved without a random draw (e.g. DNS failures short-circuited up
+    front) are excluded from both the sample and the population.
+    
+    Args:
+        job (dict): XML analysis job data with 'sampling' enabled
+        
+    Returns:
+        dict: Estimates with sample/population sizes, or None if too few rows yet
+    """
+    excluded = job['sampling']['excluded']
+    sampled = job['completed'] - excluded
+    population = job['total'] - excluded
+    
+    if sampled < min(Config.XML_SAMPLE_MIN_RESULTS, population):
+        return None
+    
+    confidence = Config.XML_SAMPLE_CONFIDENCE
+    
+    return {
+        'sampled': sampled,
+        'population': population,
+        'confidence': confidence,
+        'exact': sampled >= population,
+        'type_counts': estimate_counts(job['type_counts'], sampled, population, confidence),
+        'tag_counts': {
+            tag_name: estimate_counts(counter, sampled, population, confidence)
+            for tag_name, counter in job['tag_counts'].items()
+        }
+    }
\ No newline at end of file
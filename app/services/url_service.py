@@ -1,27 +1,28 @@
 import requests
 from config import Config
+from app.services.http_service import fetch, get_validators, build_conditional_headers
 
-def check_single_url(url):
+def check_single_url(url, validators=None, hedge=None):
     """
     Check if a URL is valid by making a HEAD request, falling back to GET if needed.
     
     Args:
         url (str): The URL to check
+        validators (dict, optional): ETag/Last-Modified from a previous check.
+            When given, the request is conditional and an unchanged resource
+            comes back as statusCode 304 with 'notModified' set.
+        hedge (bool, optional): Send a hedged second request if this one is slow
+            (defaults to Config.HEDGE_ENABLED)
         
     Returns:
         dict: Result with URL status information
     """
+    headers = build_conditional_headers(validators)
+    
     try:
         # Try HEAD request first (faster, doesn't download content)
-        response = requests.head(url, timeout=Config.REQUEST_TIMEOUT)
-        status_code = response.status_code
-        is_valid = 200 <= status_code < 300
-        
-        return {
-            'url': url,
-            'isValid': is_valid,
-            'statusCode': status_code
-        }
+        response = fetch('HEAD', url, hedge, timeout=Config.REQUEST_TIMEOUT, headers=headers, allow_redirects=False)
+        return _build_result(url, response)
     except requests.Timeout:
         # Handle timeout
         return {
@@ -33,17 +34,10 @@ def check_single_url(url):
     except requests.RequestException:
         # If HEAD fails, try GET with streaming (to avoid downloading full content)
         try:
-            response = requests.get(url, timeout=Config.REQUEST_TIMEOUT, stream=True)
+            response = fetch('GET', url, hedge, timeout=Config.REQUEST_TIMEOUT, stream=True, headers=headers)
             response.close()  # Close connection to prevent downloading content
             
-            status_code = response.status_code
-            is_valid = 200 <= status_code < 300
-            
-            return {
-                'url': url,
-                'isValid': is_valid,
-                'statusCode': status_code
-            }
+            return _build_result(url, response)
         except Exception as e:
             # All attempts failed
             return {
@@ -51,4 +45,31 @@ def check_single_url(url):
                 'isValid': False,
                 'statusCode': 0,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+def _build_result(url, response):
+    """
+    Build the check result for a response, keeping its cache validators.
+    
+    Args:
+        url (str): The checked URL
+        response (requests.Response): The HEAD or GET response
+        
+    Returns:
+        dict: Result with URL status information
+    """
+    status_code = response.status_code
+    
+    result = {
+        'url': url,
+        'isValid': 200 <= status_code < 300,
+        'statusCode': status_code,
+        **get_validators(response)
+    }
+    
+    # Unchanged since the previous check (only returned for conditional requests)
+    if status_code == 304:
+        result['isValid'] = True
+        result['notModified'] = True
+        
+    return result
\ No newline at end of file
@@ -1,6 +1,12 @@
-import requests
+import queue
+import threading
+import multiprocessing
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from requests.compat import chardet
 from config import Config
+from app.services.http_service import session, fetch, get_validators, build_conditional_headers
 
 def check_xml_url(url):
     """
@@ -14,7 +20,7 @@ def check_xml_url(url):
     """
     try:
         # GET request to check XML content
-        response = requests.get(url, timeout=Config.REQUEST_TIMEOUT)
+        response = session.get(url, timeout=Config.REQUEST_TIMEOUT)
         
         # Check status code
         status_code = response.status_code
@@ -41,35 +47,103 @@ def check_xml_url(url):
             'error': str(e)
         }
 
-def analyze_xml_content(url):
+def analyze_xml_content(url, validators=None, hedge=None):
     """
     Analyze XML content at the specified URL, looking for all required tags:
     COURSE_CODE, GRADE, SESSION, UNIT, PERIOD, ORDER, STUDY, TYPE, STYLE
     
+    Fetches and parses in the calling thread. Batch jobs should use
+    iter_xml_analysis, which moves parsing off to a process pool.
+    
     Args:
         url (str): The URL to analyze
+        validators (dict, optional): ETag/Last-Modified from a previous analysis.
+            When given, the request is conditional and an unchanged document
+            comes back as statusCode 304 with 'notModified' set, without a body.
+        hedge (bool, optional): Send a hedged second request if this one is slow
+            (defaults to Config.HEDGE_ENABLED)
         
     Returns:
         dict: Result with XML analysis information including all tag contents
     """
+    result, document = fetch_xml_document(url, validators, hedge)
+    if document is None:
+        return result
+    return parse_xml_document(*document)
+
+def fetch_xml_document(url, validators=None, hedge=None):
+    """
+    Network stage of the XML analysis: download the document without decoding it.
+    
+    Args:
+        url (str): The URL to analyze
+        validators (dict, optional): ETag/Last-Modified from a previous analysis
+        hedge (bool, optional): Send a hedged second request if this one is slow
+        
+    Returns:
+        tuple: (final result, None) when there is nothing to parse, otherwise
+            (None, document) where document is the argument tuple for parse_xml_document
+    """
     try:
         # GET request to retrieve XML content
-        response = requests.get(url, timeout=Config.XML_REQUEST_TIMEOUT)
+        response = fetch('GET', url, hedge, timeout=Config.XML_REQUEST_TIMEOUT, headers=build_conditional_headers(validators))
         
         # Check status code
         status_code = response.status_code
         is_valid = 200 <= status_code < 300
         
+        # Document unchanged since the previous analysis
+        if status_code == 304:
+            return {
+                'url': url,
+                'isValid': True,
+                'statusCode': status_code,
+                'notModified': True
+            }, None
+        
         # If status code is not in 200s, return invalid result
         if not is_valid:
             return {
                 'url': url,
                 'isValid': False,
                 'statusCode': status_code
-            }
+            }, None
         
-        # Get XML content and try to parse
-        xml_content = response.text
+        # Raw bytes plus the header encoding; decoding happens in the parse stage
+        return None, (url, status_code, response.content, response.encoding, get_validators(response))
+            
+    except Exception as e:
+        return {
+            'url': url,
+            'isValid': False,
+            'statusCode': 0,
+            'error': str(e)
+        }, None
+
+def parse_xml_document(url, status_code, content, encoding, validators):
+    """
+    CPU stage of the XML analysis: decode the document and extract all tag values.
+    
+    Runs in a parse worker process, so it only takes and returns picklable values.
+    
+    Args:
+        url (str): The analyzed URL
+        status_code (int): HTTP status code of the response
+        content (bytes): Raw response body
+        encoding (str or None): Encoding from the Content-Type header
+        validators (dict): ETag/Last-Modified of the response
+        
+    Returns:
+        dict: Result with XML analysis information including all tag contents
+    """
+    try:
+        # Decode the same way requests' Response.text does
+        if encoding is None:
+            encoding = chardet.detect(content)['encoding']
+        try:
+            xml_content = str(content, encoding, errors='replace')
+        except (LookupError, TypeError):
+            xml_content = str(content, errors='replace')
         
         # Default values for all tags - initialize with "undefined"
         tag_values = {
@@ -124,7 +198,8 @@ def analyze_xml_content(url):
                 'url': url,
                 'isValid': True,
                 'statusCode': status_code,
-                **tag_values  # Include all tag values
+                **tag_values,  # Include all tag values
+                **validators
             }
             
             return result
@@ -144,4 +219,99 @@ def analyze_xml_content(url):
             'isValid': False,
             'statusCode': 0,
             'error': str(e)
-        }
\ No newline at end of file
+        }
+
+# Process pool shared by all analysis jobs in this server process
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool():
+    """Create the parse process pool on first use"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn, not fork: the server process is multi-threaded
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=Config.XML_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _parse_pool
+
+def _reset_parse_pool(pool):
+    """Drop a broken parse pool so the next submission starts a fresh one"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False)
+
+def iter_xml_analysis(urls, validators=None, hedge=None):
+    """
+    Analyze many XML URLs with separate network and parse stages.
+    
+    Fetch threads only download; parsing runs in a process pool sized to the
+    core count, so large documents don't hold the GIL while other threads wait
+    on sockets. A fetch thread blocks before handing over a body while
+    XML_PARSE_QUEUE_SIZE documents are already queued or being parsed, which
+    keeps downloaded bodies from piling up in memory.
+    
+    Args:
+        urls (list): URLs to analyze
+        validators (dict, optional): ETag/Last-Modified per URL for conditional requests
+        hedge (bool, optional): Hedge slow fetches (defaults to Config.HEDGE_ENABLED)
+        
+    Yields:
+        dict: One analysis result per URL, in completion order
+    """
+    validators = validators or {}
+    results = queue.Queue()
+    parse_slots = threading.BoundedSemaphore(Config.XML_PARSE_QUEUE_SIZE)
+    
+    def error_result(url, e):
+        return {
+            'url': url,
+            'isValid': False,
+            'statusCode': 0,
+            'error': str(e)
+        }
+    
+    def on_parsed(future, url, pool):
+        parse_slots.release()
+        try:
+            results.put(future.result())
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _reset_parse_pool(pool)
+            results.put(error_result(url, e))
+    
+    def fetch_job(url):
+        try:
+            result, document = fetch_xml_document(url, validators.get(url), hedge)
+            if document is None:
+                results.put(result)
+                return
+            
+            if not Config.XML_PARSE_IN_PROCESS:
+                results.put(parse_xml_document(*document))
+                return
+            
+            # Backpressure: wait for room in the parse stage
+            parse_slots.acquire()
+            pool = _get_parse_pool()
+            try:
+                future = pool.submit(parse_xml_document, *document)
+            except Exception as e:
+                parse_slots.release()
+                if isinstance(e, BrokenProcessPool):
+                    _reset_parse_pool(pool)
+                raise
+            future.add_done_callback(lambda f: on_parsed(f, url, pool))
+        except Exception as e:
+            results.put(error_result(url, e))
+    
+    with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as fetchers:
+        for url in urls:
+            fetchers.submit(fetch_job, url)
+        
+        for _ in range(len(urls)):
+            yield results.get()
\ No newline at end of file
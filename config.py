@@ -1,7 +1,41 @@
+import os
+
 class Config:
     """Configuration settings for the application"""
     DEBUG = True
     MAX_WORKERS = 10
     REQUEST_TIMEOUT = 5
     XML_REQUEST_TIMEOUT = 10
-    JOB_CLEANUP_HOURS = 24
\ No newline at end of file
+    JOB_CLEANUP_HOURS = 24
+    # Identical submissions within this many seconds of completion reuse the finished job
+    JOB_DEDUP_WINDOW_SECONDS = 300
+    # Hedged requests: resend a slow request once it passes the host's latency percentile
+    HEDGE_ENABLED = False
+    HEDGE_PERCENTILE = 95
+    HEDGE_MIN_SAMPLES = 20
+    HEDGE_WINDOW = 200
+    HEDGE_MAX_TRACKED_HOSTS = 1000
+    HEDGE_BUDGET_RATIO = 0.05
+    HEDGE_BUDGET_BURST = 10
+    HEDGE_MAX_IN_FLIGHT = 20
+    # Threads running hedge-eligible primary requests, shared by all hedged jobs in a
+    # server process; requests beyond this many in flight go out unhedged
+    HEDGE_POOL_SIZE = int(os.environ.get('HEDGE_POOL_SIZE', 100))
+    # Directory where finished ZIP archives are spooled until downloaded
+    ZIP_SPOOL_DIR = os.environ.get('ZIP_SPOOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spool'))
+    ZIP_SPOOL_TTL_HOURS = 6
+    ZIP_SPOOL_CLEANUP_INTERVAL_SECONDS = ZIP_SPOOL_TTL_HOURS * 3600 / 12
+    # Shared HTTP session / DNS cache for batch jobs
+    HTTP_POOL_HOSTS = 100
+    DNS_CACHE_ENABLED = True
+    DNS_CACHE_TTL = 300
+    DNS_NEGATIVE_TTL = 30
+    DNS_PREWARM_WORKERS = 20
+    DNS_WARM_CONNECTIONS = False
+    # Progressive sampling estimates for XML tag analysis
+    XML_SAMPLE_MIN_RESULTS = 30
+    XML_SAMPLE_CONFIDENCE = 0.95
+    # Process pool for the CPU-bound XML parse stage
+    XML_PARSE_IN_PROCESS = True
+    XML_PARSE_WORKERS = int(os.environ.get('XML_PARSE_WORKERS', os.cpu_count() or 1))
+    XML_PARSE_QUEUE_SIZE = XML_PARSE_WORKERS * 2
\ No newline at end of file
@@ -1,6 +1,10 @@
 from app.main import create_app
 
-app = create_app()
+# XML parse worker processes (multiprocessing spawn) re-import this file as
+# __mp_main__; only the server process itself should build the app.
+# gunicorn imports this module as 'run' and needs the module-level app.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)